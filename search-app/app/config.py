@@ -37,6 +37,8 @@ class Settings:
     model_cache_dir: str = os.getenv("MODEL_CACHE_DIR", "storage/models")
     storage_backend: str = os.getenv("STORAGE_BACKEND", "local").lower()  # local | oci
     oci_os_bucket_name: Optional[str] = os.getenv("OCI_OS_BUCKET_NAME")
+    # Optional: set to skip the per-tenancy namespace discovery call entirely
+    oci_os_namespace: Optional[str] = os.getenv("OCI_OS_NAMESPACE")
     # Upload & parsing
     max_upload_size_mb: int = int(os.getenv("MAX_UPLOAD_SIZE_MB", "50"))
     use_pymupdf: bool = _get_bool("USE_PYMUPDF", False)
@@ -62,6 +64,22 @@ class Settings:
     embedding_model_name: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     embedding_dim: int = int(os.getenv("EMBEDDING_DIM", "384"))
     embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH", "64"))
+    embedding_backend: str = os.getenv("EMBEDDING_BACKEND", "torch").lower()  # torch | onnx
+    onnx_model_dir: str = os.getenv("ONNX_MODEL_DIR", "storage/models/onnx")
+    embedding_device: str = os.getenv("EMBEDDING_DEVICE", "auto").lower()  # auto | cuda | mps | cpu
+    embedding_dtype: str = os.getenv("EMBEDDING_DTYPE", "float32").lower()  # float32 | bfloat16 | float16
+    embedding_compile: bool = _get_bool("EMBEDDING_COMPILE", False)
+    query_cache_size: int = int(os.getenv("QUERY_CACHE_SIZE", "4096"))
+    # Persistent content-hash -> embedding cache; re-ingesting identical chunks
+    # skips the model entirely
+    embedding_cache_enabled: bool = _get_bool("EMBEDDING_CACHE", True)
+    # Semantic RAG answer cache (skip the LLM for near-duplicate questions)
+    semantic_cache_enabled: bool = _get_bool("SEMANTIC_CACHE", True)
+    semantic_cache_size: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "10000"))
+    semantic_cache_threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    # Torch threading; 0 = auto (cpu_count divided across uvicorn workers)
+    embedding_intra_threads: int = int(os.getenv("EMBEDDING_INTRA_THREADS", "0"))
+    embedding_interop_threads: int = int(os.getenv("EMBEDDING_INTEROP_THREADS", "1"))
 
     # pgvector index
     pgvector_metric: str = os.getenv("PGVECTOR_METRIC", "cosine")  # cosine|l2|ip
@@ -71,6 +89,9 @@ class Settings:
     # Full-text search
     fts_config: str = os.getenv("FTS_CONFIG", "english")
 
+    # Optional Gradio admin UI, mounted under /gradio when enabled
+    enable_gradio_ui: bool = _get_bool("ENABLE_GRADIO_UI", False)
+
     # Security
     allow_cors: bool = _get_bool("ALLOW_CORS", True)
     basic_auth_user: str = os.getenv("BASIC_AUTH_USER", "admin")
@@ -94,6 +115,8 @@ class Settings:
     oci_fingerprint: Optional[str] = os.getenv("OCI_FINGERPRINT")
     oci_private_key_path: Optional[str] = os.getenv("OCI_PRIVATE_KEY_PATH")
     oci_private_key_passphrase: Optional[str] = os.getenv("OCI_PRIVATE_KEY_PASSPHRASE")
+    # Coalesce concurrent identical completion requests into one OCI round-trip
+    oci_micro_batch: bool = _get_bool("OCI_MICRO_BATCH", False)
 
 
 def build_database_url(s: Settings) -> str:
@@ -10,11 +10,28 @@ from psycopg_pool import ConnectionPool
 
 from .config import Settings, build_database_url, settings
 
+# Binary vector adapter: sends embeddings as a single contiguous buffer instead
+# of a ~10 KB text literal the server has to re-parse float by float
+try:
+    from pgvector.psycopg import register_vector  # type: ignore
+except Exception:  # pragma: no cover - optional dependency
+    register_vector = None
+
 logger = logging.getLogger(__name__)
 
 _pool: Optional[ConnectionPool] = None
 
 
+def _configure_conn(conn: psycopg.Connection) -> None:
+    if register_vector is not None:
+        try:
+            register_vector(conn)
+        except Exception as e:
+            # e.g. the vector extension is not installed yet; callers fall
+            # back to text literals when the adapter is absent
+            logger.debug("pgvector adapter registration skipped: %s", e)
+
+
 def get_pool() -> ConnectionPool:
     global _pool
     if _pool is None:
@@ -24,6 +41,7 @@ def get_pool() -> ConnectionPool:
             min_size=settings.db_pool_min_size,
             max_size=settings.db_pool_max_size,
             kwargs={"autocommit": True},
+            configure=_configure_conn,
         )
         logger.info("Initialized PostgreSQL connection pool (min=%s, max=%s)", settings.db_pool_min_size, settings.db_pool_max_size)
     return _pool
@@ -95,6 +113,17 @@ def init_db(s: Settings = settings) -> None:
                 """
             )
 
+            cur.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    chunk_hash BYTEA PRIMARY KEY,
+                    embedding vector({dim}) NOT NULL,
+                    embedding_model TEXT,
+                    created_at TIMESTAMPTZ DEFAULT now()
+                );
+                """
+            )
+
             cur.execute(
                 """
                 CREATE UNIQUE INDEX IF NOT EXISTS idx_chunks_doc_chunk ON chunks(document_id, chunk_index);
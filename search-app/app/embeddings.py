@@ -1,20 +1,70 @@
 from __future__ import annotations
 
+import concurrent.futures
 import logging
 import os
 from functools import lru_cache
+from pathlib import Path
 from typing import Iterable, List
 
+import numpy as np
+
 from sentence_transformers import SentenceTransformer
 
 from .config import settings
 
 logger = logging.getLogger(__name__)
 
+# All encode calls funnel through one worker thread: the backend already
+# parallelizes internally, so concurrent encodes from request threads would
+# only fight over cores and thrash caches.
+_EMBED_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+
+
+def _resolve_device() -> str:
+    """Pick the embedding device: honor EMBEDDING_DEVICE, else prefer CUDA > MPS > CPU."""
+    if settings.embedding_device != "auto":
+        return settings.embedding_device
+    try:
+        import torch
+
+        if torch.cuda.is_available():
+            return "cuda"
+        if getattr(torch.backends, "mps", None) and torch.backends.mps.is_available():
+            return "mps"
+    except Exception:
+        pass
+    return "cpu"
+
+
+def _tune_torch_threads() -> None:
+    """Pin torch thread counts once at model load.
+
+    Torch defaults are wrong for this deployment shape: with several uvicorn
+    workers each defaulting to all cores, workers fight over the same CPUs.
+    Default splits cores evenly across workers; override with
+    EMBEDDING_INTRA_THREADS / EMBEDDING_INTEROP_THREADS.
+    """
+    try:
+        import torch
+
+        intra = settings.embedding_intra_threads or max(1, (os.cpu_count() or 1) // max(1, settings.workers))
+        torch.set_num_threads(intra)
+        try:
+            torch.set_num_interop_threads(max(1, settings.embedding_interop_threads))
+        except RuntimeError:
+            pass  # interop count can only be set before the first parallel op
+        logger.info("Torch threads set: intra=%s interop=%s (cpus=%s workers=%s)",
+                    intra, settings.embedding_interop_threads, os.cpu_count(), settings.workers)
+    except Exception as e:
+        logger.warning("Could not tune torch thread counts: %s", e)
+
 
 @lru_cache(maxsize=1)
 def get_model() -> SentenceTransformer:
-    logger.info("Loading embeddings model: %s", settings.embedding_model_name)
+    _tune_torch_threads()
+    device = _resolve_device()
+    logger.info("Loading embeddings model: %s (device=%s)", settings.embedding_model_name, device)
     # Ensure model cache directories are set for HF/Transformers
     os.makedirs(settings.model_cache_dir, exist_ok=True)
     os.environ.setdefault("HF_HOME", settings.model_cache_dir)
@@ -24,29 +74,222 @@ def get_model() -> SentenceTransformer:
     os.environ.setdefault("HF_HUB_DISABLE_TELEMETRY", "1")
     os.environ.setdefault("HF_HUB_ENABLE_HF_TRANSFER", "1")
     try:
-        model = SentenceTransformer(settings.embedding_model_name, cache_folder=settings.model_cache_dir)
+        model = SentenceTransformer(settings.embedding_model_name, cache_folder=settings.model_cache_dir, device=device)
     except Exception as e:
         logger.warning("Model download failed (%s). Retrying with local_files_only=True", e)
         try:
             model = SentenceTransformer(
                 settings.embedding_model_name,
                 cache_folder=settings.model_cache_dir,
+                device=device,
                 local_files_only=True,
             )
         except Exception as e2:
             logger.exception("Failed to load embedding model offline as well: %s", e2)
             raise
+    model = _apply_fast_path(model)
+    if device != "cpu":
+        # Pre-warm so the first real query doesn't pay kernel init + host-to-device copy
+        try:
+            model.encode(["warmup"], batch_size=1, convert_to_numpy=True, show_progress_bar=False)
+        except Exception as e:
+            logger.warning("Device warmup encode failed: %s", e)
     return model
 
 
-def embed_texts(texts: Iterable[str], batch_size: int | None = None) -> List[list[float]]:
+def _apply_fast_path(model: SentenceTransformer) -> SentenceTransformer:
+    """Optionally convert the transformer to a reduced-precision dtype and wrap it
+    with torch.compile. Halving weight bytes halves memory bandwidth on the
+    encode path; compile fuses kernels and removes per-call Python dispatch.
+    Controlled by EMBEDDING_DTYPE / EMBEDDING_COMPILE; any failure keeps FP32 eager.
+    """
+    import torch
+
+    try:
+        if settings.embedding_dtype == "bfloat16":
+            model[0].auto_model = model[0].auto_model.to(dtype=torch.bfloat16)
+            logger.info("Embedding model converted to bfloat16")
+        elif settings.embedding_dtype == "float16":
+            model[0].auto_model = model[0].auto_model.half()
+            logger.info("Embedding model converted to float16")
+    except Exception as e:
+        logger.warning("Embedding dtype conversion failed (%s); keeping float32", e)
+
+    if settings.embedding_compile:
+        try:
+            model[0].auto_model = torch.compile(model[0].auto_model, mode="reduce-overhead", dynamic=True)
+            # Warm up once so the compile cost is paid at startup, not on the first query
+            model.encode(["warmup"], batch_size=1, convert_to_numpy=True, show_progress_bar=False)
+            logger.info("Embedding model wrapped with torch.compile (reduce-overhead)")
+        except Exception as e:
+            logger.warning("torch.compile of embedding model failed (%s); using eager mode", e)
+    return model
+
+
+@lru_cache(maxsize=1)
+def get_onnx_runtime():
+    """Load (or export+quantize on first use) an ONNX Runtime session and tokenizer.
+    Returns (session, tokenizer) or None if the ONNX stack is unavailable, in which
+    case embed_texts falls back to the SentenceTransformer backend.
+    """
+    try:
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+    except Exception as e:
+        logger.warning("ONNX backend requested but onnxruntime/transformers unavailable (%s); falling back to torch", e)
+        return None
+
+    model_dir = Path(settings.onnx_model_dir)
+    quantized_path = model_dir / "model_quantized.onnx"
+    model_path = model_dir / "model.onnx"
+
+    # Export + int8 dynamic quantization once (requires optimum); reuse afterwards
+    if not quantized_path.exists() and not model_path.exists():
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+            model_dir.mkdir(parents=True, exist_ok=True)
+            logger.info("Exporting %s to ONNX in %s", settings.embedding_model_name, model_dir)
+            ort_model = ORTModelForFeatureExtraction.from_pretrained(settings.embedding_model_name, export=True)
+            ort_model.save_pretrained(str(model_dir))
+            quantizer = ORTQuantizer.from_pretrained(str(model_dir))
+            qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+            quantizer.quantize(save_dir=str(model_dir), quantization_config=qconfig)
+        except Exception as e:
+            logger.warning("ONNX export/quantization failed (%s); falling back to torch", e)
+            if not model_path.exists():
+                return None
+
+    onnx_file = quantized_path if quantized_path.exists() else model_path
+    try:
+        so = ort.SessionOptions()
+        so.intra_op_num_threads = os.cpu_count() or 1
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        session = ort.InferenceSession(str(onnx_file), sess_options=so, providers=["CPUExecutionProvider"])
+        tokenizer = AutoTokenizer.from_pretrained(
+            str(model_dir) if (model_dir / "tokenizer_config.json").exists() else settings.embedding_model_name,
+            cache_dir=settings.model_cache_dir,
+        )
+        logger.info("ONNX embedding session loaded: %s", onnx_file)
+        return session, tokenizer
+    except Exception as e:
+        logger.warning("Failed to load ONNX session from %s (%s); falling back to torch", onnx_file, e)
+        return None
+
+
+def _pad_to_bucket(enc, tokenizer):
+    """Pad tokenized batches up to the next power-of-2 length (capped at the model max).
+
+    Padding only to the batch max produces a new tensor shape per call, which defeats
+    graph/shape reuse in ONNX Runtime (and recompiles under torch.compile). Bucketing
+    keeps the set of observed shapes to a handful at a tiny FLOP cost.
+    """
+    import math
+
+    import numpy as np
+
+    seq_len = int(enc["input_ids"].shape[1])
+    if seq_len <= 0:
+        return enc
+    max_len = getattr(tokenizer, "model_max_length", 512) or 512
+    target = min(2 ** math.ceil(math.log2(seq_len)), max_len)
+    if target <= seq_len:
+        return enc
+    pad_id = tokenizer.pad_token_id or 0
+    for key in enc:
+        fill = pad_id if key == "input_ids" else 0
+        enc[key] = np.pad(enc[key], ((0, 0), (0, target - seq_len)), constant_values=fill)
+    return enc
+
+
+def _embed_texts_onnx(texts: List[str], batch_size: int) -> np.ndarray | None:
+    runtime = get_onnx_runtime()
+    if runtime is None:
+        return None
+    session, tokenizer = runtime
+    input_names = {i.name for i in session.get_inputs()}
+    out: List[np.ndarray] = []
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start : start + batch_size]
+        enc = tokenizer(batch, padding=True, truncation=True, return_tensors="np")
+        enc = _pad_to_bucket(enc, tokenizer)
+        feed = {k: v for k, v in enc.items() if k in input_names}
+        hidden = session.run(None, feed)[0]
+        # Mean-pool over valid tokens, then L2-normalize
+        mask = enc["attention_mask"][..., None].astype(hidden.dtype)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.linalg.norm(pooled, axis=1, keepdims=True)
+        out.append(pooled.astype(np.float32, copy=False))
+    return np.vstack(out) if out else np.empty((0, settings.embedding_dim), dtype=np.float32)
+
+
+def _encode_texts(texts: List[str], bs: int) -> np.ndarray:
+    if not texts:
+        return np.empty((0, settings.embedding_dim), dtype=np.float32)
+    if settings.embedding_backend == "onnx":
+        embs = _embed_texts_onnx(texts, bs)
+        if embs is not None:
+            return embs
     model = get_model()
+    import torch
+
+    with torch.inference_mode():
+        embs = model.encode(
+            texts,
+            batch_size=bs,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False,
+        )
+    return np.ascontiguousarray(embs, dtype=np.float32)
+
+
+def _embed_texts_ordered(texts: List[str], bs: int) -> np.ndarray:
+    if len(texts) <= 1:
+        return _encode_texts(texts, bs)
+    # Encode in length-sorted order so each batch pads to near-uniform length
+    # (one long outlier otherwise pads the whole batch), then restore input order.
+    lens = [len(t) for t in texts]
+    if min(lens) == max(lens):
+        # Uniform lengths (typical for fixed-size document chunks): nothing to gain
+        # from sorting, skip the scatter-back
+        return _encode_texts(texts, bs)
+    order = np.argsort(lens, kind="stable")
+    sorted_embs = _encode_texts([texts[i] for i in order], bs)
+    out = np.empty_like(sorted_embs)
+    out[order] = sorted_embs
+    return out
+
+
+def embed_texts(texts: Iterable[str], batch_size: int | None = None) -> np.ndarray:
+    """Embed texts, returning a contiguous float32 (N, D) array.
+
+    Returning numpy rows instead of Python float lists keeps ~N*D boxed floats
+    off the heap per ingest and lets the DB layer send vectors without
+    re-converting element by element.
+    """
+    texts = list(texts)
     bs = batch_size or settings.embedding_batch_size
-    embs = model.encode(
-        list(texts),
-        batch_size=bs,
-        convert_to_numpy=True,
-        normalize_embeddings=True,
-        show_progress_bar=False,
+    return _EMBED_EXECUTOR.submit(_embed_texts_ordered, texts, bs).result()
+
+
+async def aembed_texts(texts: Iterable[str], batch_size: int | None = None) -> np.ndarray:
+    """Async facade: embed on the dedicated worker without blocking the event loop."""
+    import asyncio
+
+    bs = batch_size or settings.embedding_batch_size
+    return await asyncio.get_running_loop().run_in_executor(
+        _EMBED_EXECUTOR, _embed_texts_ordered, list(texts), bs
     )
-    return [e.tolist() for e in embs]
+
+
+@lru_cache(maxsize=settings.query_cache_size)
+def embed_query_cached(query: str) -> np.ndarray:
+    """Embed a single query with an exact-match LRU cache.
+
+    Repeat questions (common in interactive search/RAG sessions) skip the model
+    entirely. Embeddings are small (~1.5 KB at 384 dims) so the default 4096
+    entries cost a few MB at most.
+    """
+    return embed_texts([query])[0]
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 from pathlib import Path
@@ -7,7 +8,7 @@ from typing import Any, Dict, List
 
 from fastapi import FastAPI, File, UploadFile, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 import uvicorn
@@ -15,9 +16,10 @@ import uvicorn
 from .auth import BasicAuthMiddleware
 from .config import settings
 from .db import init_db, get_conn
-from .store import ensure_dirs, ingest_file_path, save_upload
-from .search import semantic_search, fulltext_search, hybrid_search, rag
-from .embeddings import get_model
+from .store import ensure_dirs, ingest_prepared_batch, prepare_ingest, save_upload_stream
+from .search import semantic_search, fulltext_search, hybrid_search, rag_retrieve, rag_answer
+from .embeddings import embed_query_cached, get_model
+from .semantic_cache import answer_cache
 
 logger = logging.getLogger("searchapp")
 logging.basicConfig(level=os.getenv("LOGLEVEL", "INFO"))
@@ -29,7 +31,9 @@ STATIC_DIR = BASE_DIR / "static"
 TEMPLATES_DIR.mkdir(parents=True, exist_ok=True)
 STATIC_DIR.mkdir(parents=True, exist_ok=True)
 
-app = FastAPI(title="Enterprise Search App", version="0.1.0")
+# orjson serializes the large hit payloads (KBs of chunk text per hit) several
+# times faster than the stdlib encoder and handles datetime/numpy types natively
+app = FastAPI(title="Enterprise Search App", version="0.1.0", default_response_class=ORJSONResponse)
 # Protect root UI and API with Basic Auth
 app.add_middleware(BasicAuthMiddleware, protect_paths=("/", "/api", "/docs", "/openapi.json", "/redoc"))
 
@@ -46,6 +50,19 @@ if settings.allow_cors:
 app.mount("/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
 templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
 
+# The Gradio UI (app.ui) is only imported and mounted on demand so the default
+# deployment pays no gradio import cost and there is a single canonical app module
+if settings.enable_gradio_ui:
+    try:
+        import gradio as gr
+
+        from .ui import build_ui
+
+        app = gr.mount_gradio_app(app, build_ui(), path="/gradio")
+        logger.info("Gradio UI mounted at /gradio")
+    except Exception as e:
+        logger.exception("Failed to mount Gradio UI: %s", e)
+
 
 @app.on_event("startup")
 def on_startup():
@@ -148,43 +165,78 @@ def doc_summary(doc_id: int):
 
 @app.post("/api/upload")
 async def upload(files: List[UploadFile] = File(...)):
+    # Stream each spooled body straight to disk (and OCI, when configured) off the
+    # event loop instead of buffering whole files in memory with f.read()
+    saved = await asyncio.gather(
+        *(asyncio.to_thread(save_upload_stream, f.file, Path(f.filename).name) for f in files)
+    )
+
     results: List[Dict[str, Any]] = []
-    for f in files:
-        data = await f.read()
-        local_path, oci_url = save_upload(data, Path(f.filename).name)
+    prepared = []
+    prepared_entries = []  # parallel (result-dict, local_path) for filling in after the batched embed
+    local_paths: List[str] = []
+    for f, (local_path, oci_url) in zip(files, saved):
         # Use basename as title and include original filename and optional object URL in metadata
         title = Path(f.filename).name
         title_no_ext = Path(title).stem
+        local_paths.append(local_path)
         logger.info("Upload stored: backend=%s local=%s oci=%s", settings.storage_backend, local_path, "yes" if oci_url else "no")
+        entry = {"filename": title, "title": title_no_ext, "object_url": oci_url}
+        results.append(entry)
         try:
             meta = {"filename": title}
             if oci_url:
                 meta["object_url"] = oci_url
-            ing = ingest_file_path(local_path, title=title_no_ext, metadata=meta)
-            results.append({
-                "filename": title,
-                "title": title_no_ext,
-                "document_id": ing.document_id,
-                "chunks": ing.num_chunks,
-                "object_url": oci_url,
-                "status": "ok",
-            })
+            prep = await asyncio.to_thread(prepare_ingest, local_path, title_no_ext, meta)
+            prepared.append(prep)
+            prepared_entries.append(entry)
         except Exception as e:
-            results.append({
-                "filename": title,
-                "title": title_no_ext,
-                "error": str(e),
-                "status": "error",
-            })
-        finally:
-            if settings.delete_uploaded_after_ingest:
-                try:
-                    os.remove(local_path)
-                except Exception:
-                    pass
+            entry["error"] = str(e)
+            entry["status"] = "error"
+
+    # Embed all chunks from all files in one batch, then persist per document
+    try:
+        ingested = await asyncio.to_thread(ingest_prepared_batch, prepared)
+        for entry, ing in zip(prepared_entries, ingested):
+            entry["document_id"] = ing.document_id
+            entry["chunks"] = ing.num_chunks
+            entry["status"] = "ok"
+    except Exception as e:
+        for entry in prepared_entries:
+            entry["error"] = str(e)
+            entry["status"] = "error"
+
+    if settings.delete_uploaded_after_ingest:
+        for local_path in local_paths:
+            try:
+                os.remove(local_path)
+            except Exception:
+                pass
     return {"results": results}
 
 
+def _fetch_doc_info(doc_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Load per-document metadata (source_path, title, object_url) for hit enrichment."""
+    doc_info: Dict[int, Dict[str, Any]] = {}
+    if not doc_ids:
+        return doc_info
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT id, source_path, source_type, COALESCE(title, ''), metadata FROM documents WHERE id = ANY(%s)", (doc_ids,)
+            )
+            for row in cur.fetchall():
+                # row: id, source_path, source_type, title, metadata
+                sp = row[1] or ""
+                fn = sp.rsplit("/", 1)[-1] if sp else ""
+                meta = row[4] or {}
+                object_url = None
+                if isinstance(meta, dict):
+                    object_url = meta.get("object_url")
+                doc_info[int(row[0])] = {"source_path": sp, "file_name": fn, "file_type": row[2] or "", "title": row[3], "object_url": object_url}
+    return doc_info
+
+
 @app.post("/api/search")
 async def api_search(payload: Dict[str, Any]):
     q = payload.get("query", "")
@@ -195,51 +247,65 @@ async def api_search(payload: Dict[str, Any]):
 
     answer: str | None = None
     used_llm: bool = False
+    # Retrieval and DB work run in threads so the event loop stays responsive
     if mode == "semantic":
-        hits = semantic_search(q, top_k=top_k)
+        hits = await asyncio.to_thread(semantic_search, q, top_k)
     elif mode == "fulltext":
-        hits = fulltext_search(q, top_k=top_k)
+        hits = await asyncio.to_thread(fulltext_search, q, top_k)
     elif mode == "rag":
-        answer, hits, used_llm = rag(q, mode="hybrid", top_k=top_k)
+        hits = await asyncio.to_thread(rag_retrieve, q, "hybrid", top_k)
     else:
-        hits = hybrid_search(q, top_k=top_k)
+        hits = await asyncio.to_thread(hybrid_search, q, top_k)
+
+    # ANY(%s) does not need sorted input; a set already dedupes
+    doc_id_set = {h.document_id for h in hits}
+    doc_ids = list(doc_id_set)
+    if mode == "rag":
+        # Near-duplicate questions over the same documents skip the LLM entirely
+        q_emb = None
+        if settings.semantic_cache_enabled:
+            q_emb = await asyncio.to_thread(embed_query_cached, q)
+            cached = answer_cache.lookup(q_emb, doc_id_set)
+            if cached is not None:
+                answer, used_llm = cached
+                doc_info = await asyncio.to_thread(_fetch_doc_info, doc_ids)
+                q_emb = None  # already cached; skip re-insert below
+        if answer is None:
+            # The metadata query (a few ms) hides entirely under the LLM round-trip
+            (answer, used_llm), doc_info = await asyncio.gather(
+                asyncio.to_thread(rag_answer, q, hits),
+                asyncio.to_thread(_fetch_doc_info, doc_ids),
+            )
+            if q_emb is not None and used_llm:
+                answer_cache.insert(q_emb, doc_id_set, answer, used_llm)
+    else:
+        doc_info = await asyncio.to_thread(_fetch_doc_info, doc_ids)
 
-    # Enrich with document metadata (source_path, title)
-    doc_ids = sorted({h.document_id for h in hits})
-    doc_info: Dict[int, Dict[str, Any]] = {}
-    if doc_ids:
-        with get_conn() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    "SELECT id, source_path, source_type, COALESCE(title, ''), metadata FROM documents WHERE id = ANY(%s)", (doc_ids,)
-                )
-                for row in cur.fetchall():
-                    # row: id, source_path, source_type, title, metadata
-                    sp = row[1] or ""
-                    fn = sp.rsplit("/", 1)[-1] if sp else ""
-                    meta = row[4] or {}
-                    object_url = None
-                    if isinstance(meta, dict):
-                        object_url = meta.get("object_url")
-                    doc_info[int(row[0])] = {"source_path": sp, "file_name": fn, "file_type": row[2] or "", "title": row[3], "object_url": object_url}
-
-    hits_out = []
-    for h in hits:
-        entry = {
-            "chunk_id": h.chunk_id,
-            "document_id": h.document_id,
-            "chunk_index": h.chunk_index,
-            "content": h.content,
-            "distance": h.distance,
-            "rank": h.rank,
-        }
+    hits_out: List[Dict[str, Any]] = [None] * len(hits)  # type: ignore[list-item]
+    for i, h in enumerate(hits):
         meta = doc_info.get(h.document_id)
         if meta:
             # Do not expose full source_path to UI; include file_name and file_type
-            entry["file_name"] = meta.get("file_name", "")
-            entry["file_type"] = meta.get("file_type", "")
-            entry["title"] = meta.get("title", "")
-        hits_out.append(entry)
+            hits_out[i] = {
+                "chunk_id": h.chunk_id,
+                "document_id": h.document_id,
+                "chunk_index": h.chunk_index,
+                "content": h.content,
+                "distance": h.distance,
+                "rank": h.rank,
+                "file_name": meta.get("file_name", ""),
+                "file_type": meta.get("file_type", ""),
+                "title": meta.get("title", ""),
+            }
+        else:
+            hits_out[i] = {
+                "chunk_id": h.chunk_id,
+                "document_id": h.document_id,
+                "chunk_index": h.chunk_index,
+                "content": h.content,
+                "distance": h.distance,
+                "rank": h.rank,
+            }
 
     out: Dict[str, Any] = {"mode": mode if mode in {"semantic", "fulltext", "rag"} else "hybrid", "hits": hits_out}
     if answer is not None:
@@ -416,6 +482,19 @@ def llm_config():
 
 
 def main():
+    if settings.workers > 1:
+        # Warm the model cache on disk before workers start so N workers don't
+        # race to download the same weights. Uvicorn spawns its workers, so
+        # loading the model here would only pin an extra copy in the
+        # supervisor; each worker still deserializes its own at startup.
+        try:
+            from huggingface_hub import snapshot_download
+
+            os.makedirs(settings.model_cache_dir, exist_ok=True)
+            snapshot_download(settings.embedding_model_name, cache_dir=settings.model_cache_dir)
+            logger.info("Embeddings model cache warmed for %s workers", settings.workers)
+        except Exception as e:
+            logger.warning("Model cache warm-up failed (%s); workers will fetch on startup", e)
     uvicorn.run("app.main:app", host=settings.host, port=settings.port, workers=settings.workers, reload=False)
 
 
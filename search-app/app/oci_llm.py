@@ -2,14 +2,70 @@ from __future__ import annotations
 
 import inspect
 import logging
+import threading
+from functools import lru_cache
 from typing import Optional
 
 from .config import settings
 
 logger = logging.getLogger(__name__)
 
+# Import SDK model classes once at module load. Per-call imports inside the
+# completion functions acquired the interpreter import lock on every request,
+# a contention point between concurrent worker threads.
+try:
+    from oci.generative_ai_inference.models import (
+        BaseChatRequest,
+        ChatDetails,
+        GenerateTextDetails,
+        GenericChatRequest,
+        Message,
+        OnDemandServingMode,
+        TextContent,
+    )
+
+    HAS_OCI = True
+except Exception:
+    HAS_OCI = False
+
+# Client construction re-reads the config file, parses the private key and opens a
+# fresh TLS pool — far too expensive to repeat per request. Cache per (profile, region).
+_CLIENT_CACHE: dict[tuple, tuple] = {}
+_CLIENT_LOCK = threading.Lock()
+
+
+def _tune_client_session(client) -> None:
+    """Best-effort: widen the underlying requests connection pool so concurrent
+    RAG calls share keep-alive connections instead of re-handshaking."""
+    try:
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        session = client.base_client.session
+        adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=Retry(total=2, backoff_factor=0.2))
+        session.mount("https://", adapter)
+    except Exception as e:
+        logger.debug("Could not tune OCI client session pool: %s", e)
+
 
 def _build_oci_clients():
+    key = (settings.oci_config_file, settings.oci_config_profile, settings.oci_region, settings.oci_genai_endpoint)
+    cached = _CLIENT_CACHE.get(key)
+    if cached is not None:
+        return cached
+    with _CLIENT_LOCK:
+        cached = _CLIENT_CACHE.get(key)
+        if cached is not None:
+            return cached
+        client, signer = _build_oci_clients_uncached()
+        # Only cache successful construction so transient failures can retry
+        if client is not None:
+            _tune_client_session(client)
+            _CLIENT_CACHE[key] = (client, signer)
+        return client, signer
+
+
+def _build_oci_clients_uncached():
     try:
         import oci
         from oci.generative_ai_inference import GenerativeAiInferenceClient
@@ -61,6 +117,16 @@ def _build_oci_clients():
         return None, None
 
 
+@lru_cache(maxsize=64)
+def _init_params(model_cls) -> tuple[frozenset, bool]:
+    """Memoized (parameter names, accepts **kwargs) for a model class __init__.
+    inspect.signature is tens of microseconds per call and _safe_build runs
+    several times per completion request."""
+    sig = inspect.signature(model_cls.__init__)
+    has_var_kw = any(p.kind == inspect.Parameter.VAR_KEYWORD for p in sig.parameters.values())
+    return frozenset(sig.parameters), has_var_kw
+
+
 def _safe_build(model_cls, **kwargs):
     """Construct SDK model objects robustly.
     Strategy:
@@ -76,12 +142,10 @@ def _safe_build(model_cls, **kwargs):
             pass
         # Second try: filter by signature if not var-keyword
         try:
-            sig = inspect.signature(model_cls.__init__)
-            # If __init__ supports **kwargs, pass everything
-            if any(p.kind == inspect.Parameter.VAR_KEYWORD for p in sig.parameters.values()):
+            allowed, has_var_kw = _init_params(model_cls)
+            if has_var_kw:
                 return model_cls(**kwargs)
-            allowed = {k: v for k, v in kwargs.items() if k in sig.parameters}
-            return model_cls(**allowed)
+            return model_cls(**{k: v for k, v in kwargs.items() if k in allowed})
         except Exception:
             pass
         # Third try: construct empty and set attributes
@@ -109,6 +173,45 @@ def _apply_aliases(obj, mapping: dict[str, object]) -> None:
         _set_attr_if_possible(obj, k, v)
 
 
+# Token budget for the retrieved context passed to the LLM; fewer input tokens
+# means lower prefill cost and latency on the remote model.
+_CONTEXT_TOKEN_BUDGET = 3072
+
+
+@lru_cache(maxsize=1)
+def _get_token_encoder():
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.debug("tiktoken unavailable (%s); using character-based truncation", e)
+        return None
+
+
+def _truncate_to_tokens(text: str, max_tokens: int = _CONTEXT_TOKEN_BUDGET) -> str:
+    """Truncate text to a token budget rather than a character count.
+
+    Character caps waste budget on whitespace-heavy text and blow past it on
+    CJK; counting tokens keeps the prompt at a predictable size. Falls back to
+    ~4 chars/token when no tokenizer is installed.
+    """
+    enc = _get_token_encoder()
+    if enc is None:
+        return text[: max_tokens * 4]
+    tokens = enc.encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])
+
+
+# Response-shape probe orders, precomputed once so the extractor does not
+# rebuild tuples on every call.
+_TEXT_ATTRS = ("output_text", "generated_text", "text", "result", "output")
+_TEXT_LIST_ATTRS = ("output_texts", "generated_texts", "outputs")
+_DICT_LIST_KEYS = ("output_texts", "generated_texts", "outputs", "choices", "content")
+
+
 def _extract_text_from_oci_response(data) -> Optional[str]:
     """Attempt to extract text from a wide variety of OCI GenAI response shapes."""
     try:
@@ -120,13 +223,13 @@ def _extract_text_from_oci_response(data) -> Optional[str]:
             return data
 
         # Known single-string fields
-        for attr in ("output_text", "generated_text", "text", "result", "output"):
+        for attr in _TEXT_ATTRS:
             out = getattr(data, attr, None)
             if isinstance(out, str) and out.strip():
                 return out
 
         # Known list-of-strings fields
-        for attr in ("output_texts", "generated_texts", "outputs"):
+        for attr in _TEXT_LIST_ATTRS:
             arr = getattr(data, attr, None)
             if isinstance(arr, (list, tuple)) and arr:
                 # first non-empty string
@@ -196,11 +299,11 @@ def _extract_text_from_oci_response(data) -> Optional[str]:
             obj = to_dict() if callable(to_dict) else None
             if isinstance(obj, dict) and obj:
                 # try common keys
-                for key in ("output_text", "generated_text", "text", "result", "output"):
+                for key in _TEXT_ATTRS:
                     v = obj.get(key)
                     if isinstance(v, str) and v.strip():
                         return v
-                for key in ("output_texts", "generated_texts", "outputs", "choices", "content"):
+                for key in _DICT_LIST_KEYS:
                     v = obj.get(key)
                     # list of strings
                     if isinstance(v, (list, tuple)):
@@ -219,9 +322,44 @@ def _extract_text_from_oci_response(data) -> Optional[str]:
 
 
 
+# In-flight completion coalescing (OCI_MICRO_BATCH). The generic chat API takes
+# one conversation per call, so true multi-prompt batching is not available;
+# instead, concurrent duplicate requests share a single round-trip.
+_INFLIGHT: dict[tuple, "concurrent.futures.Future"] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
 def oci_chat_completion(question: str, context: str, max_tokens: int = 512, temperature: float = 0.2) -> Optional[str]:
+    if not settings.oci_micro_batch:
+        return _oci_chat_completion_impl(question, context, max_tokens, temperature)
+
+    import concurrent.futures
+
+    key = (question, hash(context), max_tokens, temperature)
+    with _INFLIGHT_LOCK:
+        fut = _INFLIGHT.get(key)
+        leader = fut is None
+        if leader:
+            fut = concurrent.futures.Future()
+            _INFLIGHT[key] = fut
+    if not leader:
+        logger.info("OCI completion coalesced with identical in-flight request")
+        return fut.result()
+    try:
+        result = _oci_chat_completion_impl(question, context, max_tokens, temperature)
+        fut.set_result(result)
+        return result
+    except BaseException as e:
+        fut.set_exception(e)
+        raise
+    finally:
+        with _INFLIGHT_LOCK:
+            _INFLIGHT.pop(key, None)
+
+
+def _oci_chat_completion_impl(question: str, context: str, max_tokens: int = 512, temperature: float = 0.2) -> Optional[str]:
     client, _ = _build_oci_clients()
-    if client is None or settings.llm_provider != "oci":
+    if client is None or not HAS_OCI or settings.llm_provider != "oci":
         logger.warning("OCI LLM inactive (provider=%s, client=%s)", settings.llm_provider, bool(client))
         return None
 
@@ -231,22 +369,20 @@ def oci_chat_completion(question: str, context: str, max_tokens: int = 512, temp
         if not comp_id or not model_id:
             raise ValueError("Set OCI_COMPARTMENT_OCID and OCI_GENAI_MODEL_ID in environment")
 
+        context = _truncate_to_tokens(context)
         prompt = (
             "You are a helpful assistant. Using the provided context, answer the question concisely.\n\n"
-            f"Question: {question}\n\nContext:\n{context[:12000]}"
+            f"Question: {question}\n\nContext:\n{context}"
         )
 
         # Try chat() path first
         try:
-            from oci.generative_ai_inference.models import (
-                ChatDetails, GenericChatRequest, Message, TextContent, OnDemandServingMode, BaseChatRequest
-            )
             sm = _safe_build(OnDemandServingMode, model_id=model_id)
             _apply_aliases(sm, {"model_id": model_id, "modelId": model_id})
             # Build GenericChatRequest with system + user messages to enforce direct answering from context
             sys_txt = _safe_build(TextContent, text="You are a helpful assistant. Answer directly based ONLY on the provided context. If the context is insufficient, say 'No answer found in the provided context.' Do not ask for more input.")
             sys_msg = _safe_build(Message, role="SYSTEM", content=[sys_txt])
-            user_txt = _safe_build(TextContent, text=f"Question: {question}\n\nContext:\n{context[:12000]}")
+            user_txt = _safe_build(TextContent, text=f"Question: {question}\n\nContext:\n{context}")
             user_msg = _safe_build(Message, role="USER", content=[user_txt])
             chat_req = _safe_build(GenericChatRequest,
                                    api_format=BaseChatRequest.API_FORMAT_GENERIC,
@@ -271,16 +407,14 @@ def oci_chat_completion(question: str, context: str, max_tokens: int = 512, temp
             if out:
                 logger.info("OCI GenAI chat() response extracted (chars=%d)", len(out))
                 return out
-            try:
-                logger.info("OCI GenAI chat(): no text extracted; type=%s fields=%s", type(resp.data), dir(resp.data))
-            except Exception:
-                logger.info("OCI GenAI chat(): no text extracted; unable to introspect resp.data")
+            logger.info("OCI GenAI chat(): no text extracted; type=%s", type(resp.data).__name__)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("OCI GenAI chat() fields=%s", dir(resp.data))
         except Exception as e:
             logger.debug("OCI chat() path not available or failed: %s", e)
 
         # Fallback to generate_text()
         try:
-            from oci.generative_ai_inference.models import GenerateTextDetails, OnDemandServingMode, TextContent
             sm = _safe_build(OnDemandServingMode, model_id=model_id)
             _apply_aliases(sm, {"model_id": model_id, "modelId": model_id})
             details = _safe_build(
@@ -303,10 +437,9 @@ def oci_chat_completion(question: str, context: str, max_tokens: int = 512, temp
             if out:
                 logger.info("OCI GenAI generate_text() response extracted (chars=%d)", len(out))
                 return out
-            try:
-                logger.info("OCI GenAI generate_text(): no text extracted; type=%s fields=%s", type(resp.data), dir(resp.data))
-            except Exception:
-                logger.info("OCI GenAI generate_text(): no text extracted; unable to introspect resp.data")
+            logger.info("OCI GenAI generate_text(): no text extracted; type=%s", type(resp.data).__name__)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("OCI GenAI generate_text() fields=%s", dir(resp.data))
             return None
         except Exception as e:
             logger.debug("OCI generate_text() path failed: %s", e)
@@ -330,17 +463,17 @@ def _introspect_obj(data) -> tuple[str, list[str]]:
 
 def oci_try_chat_debug(question: str, context: str, max_tokens: int = 512, temperature: float = 0.2) -> tuple[Optional[str], str, list[str]]:
     client, _ = _build_oci_clients()
-    if client is None or settings.llm_provider != "oci":
+    if client is None or not HAS_OCI or settings.llm_provider != "oci":
         return None, "no_client", []
     try:
-        from oci.generative_ai_inference.models import ChatDetails, Message, TextContent, OnDemandServingMode
         comp_id = settings.oci_compartment_id
         model_id = settings.oci_genai_model_id
         if not comp_id or not model_id:
             return None, "missing_ids", []
+        context = _truncate_to_tokens(context)
         prompt = (
             "You are a helpful assistant. Using the provided context, answer the question concisely.\n\n"
-            f"Question: {question}\n\nContext:\n{context[:12000]}"
+            f"Question: {question}\n\nContext:\n{context}"
         )
         details = _safe_build(
             ChatDetails,
@@ -360,17 +493,17 @@ def oci_try_chat_debug(question: str, context: str, max_tokens: int = 512, tempe
 
 def oci_try_text_debug(question: str, context: str, max_tokens: int = 512, temperature: float = 0.2) -> tuple[Optional[str], str, list[str]]:
     client, _ = _build_oci_clients()
-    if client is None or settings.llm_provider != "oci":
+    if client is None or not HAS_OCI or settings.llm_provider != "oci":
         return None, "no_client", []
     try:
-        from oci.generative_ai_inference.models import GenerateTextDetails, OnDemandServingMode, TextContent
         comp_id = settings.oci_compartment_id
         model_id = settings.oci_genai_model_id
         if not comp_id or not model_id:
             return None, "missing_ids", []
+        context = _truncate_to_tokens(context)
         prompt = (
             "You are a helpful assistant. Using the provided context, answer the question concisely.\n\n"
-            f"Question: {question}\n\nContext:\n{context[:12000]}"
+            f"Question: {question}\n\nContext:\n{context}"
         )
         details = _safe_build(
             GenerateTextDetails,
@@ -391,25 +524,23 @@ def oci_try_text_debug(question: str, context: str, max_tokens: int = 512, tempe
 def oci_chat_completion_chat_only(question: str, context: str, max_tokens: int = 512, temperature: float = 0.2) -> Optional[str]:
     """Force the chat() path and return extracted text or None."""
     client, _ = _build_oci_clients()
-    if client is None or settings.llm_provider != "oci":
+    if client is None or not HAS_OCI or settings.llm_provider != "oci":
         return None
     try:
-        from oci.generative_ai_inference.models import (
-            ChatDetails, GenericChatRequest, Message, TextContent, OnDemandServingMode, BaseChatRequest
-        )
         comp_id = settings.oci_compartment_id
         model_id = settings.oci_genai_model_id
         if not comp_id or not model_id:
             return None
+        context = _truncate_to_tokens(context)
         prompt = (
             "You are a helpful assistant. Using the provided context, answer the question concisely.\n\n"
-            f"Question: {question}\n\nContext:\n{context[:12000]}"
+            f"Question: {question}\n\nContext:\n{context}"
         )
         sm = _safe_build(OnDemandServingMode, model_id=model_id)
         _apply_aliases(sm, {"model_id": model_id, "modelId": model_id})
         sys_txt = _safe_build(TextContent, text="You are a helpful assistant. Answer directly based ONLY on the provided context. If the context is insufficient, say 'No answer found in the provided context.' Do not ask for more input.")
         sys_msg = _safe_build(Message, role="SYSTEM", content=[sys_txt])
-        user_txt = _safe_build(TextContent, text=f"Question: {question}\n\nContext:\n{context[:12000]}")
+        user_txt = _safe_build(TextContent, text=f"Question: {question}\n\nContext:\n{context}")
         user_msg = _safe_build(Message, role="USER", content=[user_txt])
         chat_req = _safe_build(GenericChatRequest,
                                api_format=BaseChatRequest.API_FORMAT_GENERIC,
@@ -438,17 +569,17 @@ def oci_chat_completion_chat_only(question: str, context: str, max_tokens: int =
 def oci_chat_completion_text_only(question: str, context: str, max_tokens: int = 512, temperature: float = 0.2) -> Optional[str]:
     """Force the generate_text() path and return extracted text or None."""
     client, _ = _build_oci_clients()
-    if client is None or settings.llm_provider != "oci":
+    if client is None or not HAS_OCI or settings.llm_provider != "oci":
         return None
     try:
-        from oci.generative_ai_inference.models import GenerateTextDetails, OnDemandServingMode, TextContent
         comp_id = settings.oci_compartment_id
         model_id = settings.oci_genai_model_id
         if not comp_id or not model_id:
             return None
+        context = _truncate_to_tokens(context)
         prompt = (
             "You are a helpful assistant. Using the provided context, answer the question concisely.\n\n"
-            f"Question: {question}\n\nContext:\n{context[:12000]}"
+            f"Question: {question}\n\nContext:\n{context}"
         )
         details = _safe_build(
             GenerateTextDetails,
@@ -6,12 +6,12 @@ from typing import Dict, List, Optional, Tuple
 
 from .config import settings
 from .db import get_conn, set_search_runtime
-from .embeddings import embed_texts
+from .embeddings import embed_query_cached
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ChunkHit:
     chunk_id: int
     document_id: int
@@ -34,7 +34,7 @@ def _vector_operator() -> str:
 
 def semantic_search(query: str, top_k: int = 10, probes: Optional[int] = None) -> List[ChunkHit]:
     from .pgvector_utils import to_vec_literal
-    q_emb = embed_texts([query])[0]
+    q_emb = embed_query_cached(query)
     op = _vector_operator()
     with get_conn() as conn:
         with conn.cursor() as cur:
@@ -91,16 +91,20 @@ def hybrid_search(query: str, top_k: int = 10, alpha: float = 0.5) -> List[Chunk
     return out
 
 
-def rag(query: str, mode: str = "hybrid", top_k: int = 6) -> Tuple[str, List[ChunkHit], bool]:
-    logger.info("rag: query=%r mode=%s top_k=%s provider=%s", query, mode, top_k, settings.llm_provider)
+def rag_retrieve(query: str, mode: str = "hybrid", top_k: int = 6) -> List[ChunkHit]:
+    """Retrieval phase of RAG: return the top chunks without calling the LLM."""
     mode = mode.lower()
     if mode == "semantic":
-        hits = semantic_search(query, top_k=top_k)
-    elif mode == "fulltext":
-        hits = fulltext_search(query, top_k=top_k)
-    else:
-        hits = hybrid_search(query, top_k=top_k)
+        return semantic_search(query, top_k=top_k)
+    if mode == "fulltext":
+        return fulltext_search(query, top_k=top_k)
+    return hybrid_search(query, top_k=top_k)
 
+
+def rag_answer(query: str, hits: List[ChunkHit]) -> Tuple[str, bool]:
+    """Generation phase of RAG: produce an answer from already-retrieved hits.
+    Returns (answer, used_llm); falls back to the raw context when no LLM is active.
+    """
     context = "\n\n".join(h.content for h in hits)
     logger.info("rag: context_chars=%d hits=%d", len(context), len(hits))
 
@@ -141,4 +145,11 @@ def rag(query: str, mode: str = "hybrid", top_k: int = 6) -> Tuple[str, List[Chu
             logger.exception("OCI LLM call failed: %s", e)
 
     logger.info("rag: answer_chars=%d", len(answer or ''))
+    return answer, used_llm
+
+
+def rag(query: str, mode: str = "hybrid", top_k: int = 6) -> Tuple[str, List[ChunkHit], bool]:
+    logger.info("rag: query=%r mode=%s top_k=%s provider=%s", query, mode, top_k, settings.llm_provider)
+    hits = rag_retrieve(query, mode=mode, top_k=top_k)
+    answer, used_llm = rag_answer(query, hits)
     return answer, hits, used_llm
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Optional, Set, Tuple
+
+import numpy as np
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticAnswerCache:
+    """Cache of final RAG answers keyed by query embedding.
+
+    Embeddings are already L2-normalized, so cosine similarity is a plain dot
+    product against the stacked matrix of cached query embeddings. A lookup
+    hits when the best similarity clears the threshold AND the cached answer
+    was produced from a sufficiently overlapping document set, which guards
+    against returning a stale answer after new documents were ingested.
+
+    Eviction is oldest-first at capacity; entries are small (one embedding row
+    plus the answer text) so the default 10k entries stay in the tens of MB.
+    """
+
+    def __init__(self, max_entries: int, threshold: float):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._embs: Optional[np.ndarray] = None  # (N, D) float32, normalized
+        self._entries: list[Tuple[frozenset, str, bool, float]] = []  # (doc_ids, answer, used_llm, ts)
+
+    def lookup(self, query_emb: np.ndarray, doc_ids: Set[int]) -> Optional[Tuple[str, bool]]:
+        q = np.asarray(query_emb, dtype=np.float32).reshape(-1)
+        with self._lock:
+            if self._embs is None or not len(self._entries):
+                return None
+            sims = self._embs @ q
+            best = int(np.argmax(sims))
+            if float(sims[best]) < self.threshold:
+                return None
+            cached_doc_ids, answer, used_llm, _ts = self._entries[best]
+            # Require the cached answer to have drawn on at least half of the
+            # currently retrieved documents
+            if len(cached_doc_ids & doc_ids) < max(1, len(doc_ids) // 2):
+                return None
+            logger.info("Semantic answer cache hit (similarity=%.3f)", float(sims[best]))
+            return answer, used_llm
+
+    def insert(self, query_emb: np.ndarray, doc_ids: Set[int], answer: str, used_llm: bool) -> None:
+        q = np.asarray(query_emb, dtype=np.float32).reshape(1, -1)
+        with self._lock:
+            if self._embs is None:
+                self._embs = q
+            else:
+                self._embs = np.vstack([self._embs, q])
+            self._entries.append((frozenset(doc_ids), answer, used_llm, time.time()))
+            if len(self._entries) > self.max_entries:
+                drop = len(self._entries) - self.max_entries
+                self._embs = self._embs[drop:]
+                del self._entries[:drop]
+
+
+answer_cache = SemanticAnswerCache(
+    max_entries=settings.semantic_cache_size,
+    threshold=settings.semantic_cache_threshold,
+)
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import shutil
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Sequence, Tuple
+from typing import Iterable, Iterator, Optional, Sequence, Tuple
 
+import numpy as np
 import psycopg
 from datetime import datetime
 from urllib.parse import quote as urlquote
@@ -25,12 +29,31 @@ class IngestResult:
     num_chunks: int
 
 
+@dataclass
+class PreparedIngest:
+    """Extracted-and-chunked file, ready for embedding + persistence."""
+    file_path: str
+    source_type: str
+    chunks: list[str]
+    title: Optional[str] = None
+    metadata: Optional[dict] = None
+
+
 def ensure_dirs() -> None:
     Path(settings.data_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.upload_dir).mkdir(parents=True, exist_ok=True)
     Path(settings.model_cache_dir).mkdir(parents=True, exist_ok=True)
 
 
+# Single-pass sanitization of upload base names: neutralize separators that
+# Path(...).name may leave behind on other platforms' inputs
+_SAFE_NAME_TABLE = str.maketrans({"/": "_", "\\": "_", "\x00": None})
+
+
+def _safe_base_name(filename: str) -> str:
+    return Path(filename).name.translate(_SAFE_NAME_TABLE).replace("..", ".")
+
+
 def _timestamp_path(base_name: str) -> Path:
     now = datetime.utcnow()
     # YYYY/MM/DD/HHMMSS structure
@@ -38,34 +61,92 @@ def _timestamp_path(base_name: str) -> Path:
     return sub / base_name
 
 
-def _upload_to_oci(bucket: str, object_name: str, data: bytes) -> Optional[str]:
-    """Upload bytes to OCI Object Storage and return object URL if successful."""
+# Object Storage client construction (config-file read + key parse + TLS pool)
+# is too expensive to repeat per upload; build once and reuse.
+_OS_CLIENT_CACHE: dict[tuple, tuple] = {}
+_OS_CLIENT_LOCK = threading.Lock()
+
+
+def _build_os_config() -> Optional[dict]:
+    """Build an OCI config dict via config file or API-key envs (matches app config)."""
+    import oci  # type: ignore
+
+    if settings.oci_config_file:
+        cfg = oci.config.from_file(settings.oci_config_file, settings.oci_config_profile)
+        if settings.oci_region:
+            cfg["region"] = settings.oci_region
+        return cfg
+    required = [settings.oci_tenancy_ocid, settings.oci_user_ocid, settings.oci_fingerprint, settings.oci_private_key_path]
+    if all(required):
+        return {
+            "tenancy": settings.oci_tenancy_ocid,
+            "user": settings.oci_user_ocid,
+            "fingerprint": settings.oci_fingerprint,
+            "key_file": settings.oci_private_key_path,
+            "pass_phrase": settings.oci_private_key_passphrase,
+            "region": settings.oci_region,
+        }
+    return None
+
+
+def _get_os_client():
+    """Return a cached (ObjectStorageClient, config) pair, or (None, None)."""
+    key = (settings.oci_config_file, settings.oci_config_profile, settings.oci_region)
+    cached = _OS_CLIENT_CACHE.get(key)
+    if cached is not None:
+        return cached
+    with _OS_CLIENT_LOCK:
+        cached = _OS_CLIENT_CACHE.get(key)
+        if cached is not None:
+            return cached
+        try:
+            import oci  # type: ignore
+
+            cfg = _build_os_config()
+            if not cfg:
+                return None, None
+            osc = oci.object_storage.ObjectStorageClient(cfg)
+        except Exception as e:
+            logger.exception("Failed to build OCI Object Storage client: %s", e)
+            return None, None
+        _OS_CLIENT_CACHE[key] = (osc, cfg)
+        return osc, cfg
+
+
+_NAMESPACE: Optional[str] = None
+
+
+def _get_namespace(osc) -> str:
+    """Object Storage namespace, fetched at most once per process.
+
+    The namespace never changes for a tenancy, so the per-upload
+    get_namespace() HTTPS roundtrip was pure latency. OCI_OS_NAMESPACE skips
+    the discovery call entirely when set.
+    """
+    global _NAMESPACE
+    if settings.oci_os_namespace:
+        return settings.oci_os_namespace
+    if _NAMESPACE is None:
+        _NAMESPACE = osc.get_namespace().data
+    return _NAMESPACE
+
+
+def _upload_to_oci(bucket: str, object_name: str, file_path: str | Path) -> Optional[str]:
+    """Upload a local file to OCI Object Storage and return object URL if successful.
+
+    UploadManager streams the file (multipart with parallel parts once it
+    crosses the SDK's threshold), so peak memory stays at buffer size instead
+    of the whole payload.
+    """
     try:
         import oci  # type: ignore
-        # Build config via file or env (compatible with app config)
-        cfg = None
-        if settings.oci_config_file:
-            cfg = oci.config.from_file(settings.oci_config_file, settings.oci_config_profile)
-            if settings.oci_region:
-                cfg["region"] = settings.oci_region
-        else:
-            # API key envs path
-            required = [settings.oci_tenancy_ocid, settings.oci_user_ocid, settings.oci_fingerprint, settings.oci_private_key_path]
-            if all(required):
-                cfg = {
-                    "tenancy": settings.oci_tenancy_ocid,
-                    "user": settings.oci_user_ocid,
-                    "fingerprint": settings.oci_fingerprint,
-                    "key_file": settings.oci_private_key_path,
-                    "pass_phrase": settings.oci_private_key_passphrase,
-                    "region": settings.oci_region,
-                }
-        if not cfg:
+
+        osc, cfg = _get_os_client()
+        if osc is None:
             return None
-        osc = oci.object_storage.ObjectStorageClient(cfg)
-        # Discover namespace if not provided
-        ns = osc.get_namespace().data
-        osc.put_object(ns, bucket, object_name, data)
+        ns = _get_namespace(osc)
+        upload_manager = oci.object_storage.UploadManager(osc, allow_parallel_uploads=True)
+        upload_manager.upload_file(ns, bucket, object_name, str(file_path))
         region = cfg.get("region") or settings.oci_region or ""
         url = f"https://objectstorage.{region}.oraclecloud.com/n/{urlquote(ns)}/b/{urlquote(bucket)}/o/{urlquote(object_name)}"
         logger.info("OCI upload complete: bucket=%s object=%s url=%s", bucket, object_name, url)
@@ -75,20 +156,25 @@ def _upload_to_oci(bucket: str, object_name: str, data: bytes) -> Optional[str]:
         return None
 
 
-def save_upload(file_bytes: bytes, filename: str) -> Tuple[str, Optional[str]]:
+def save_upload(source: bytes | str | Path, filename: str) -> Tuple[str, Optional[str]]:
     """Save upload respecting storage backend selection.
+    `source` is either the raw bytes or a path to an already-written file (e.g.
+    a Gradio temp file); the path form copies with shutil.copyfile, which uses
+    sendfile/copy_file_range on Linux and never pulls the data into Python.
     Always writes a local file for ingestion (under storage/uploads when backend includes 'local',
     otherwise under a temporary path). Optionally uploads to OCI when backend includes 'oci'.
     Returns (local_path_for_ingest, oci_object_url_or_None).
     """
     ensure_dirs()
+    from_path = not isinstance(source, (bytes, bytearray))
     max_bytes = settings.max_upload_size_mb * 1024 * 1024
-    if len(file_bytes) > max_bytes:
+    size = Path(source).stat().st_size if from_path else len(source)
+    if size > max_bytes:
         raise ValueError(f"File too large (> {settings.max_upload_size_mb} MB)")
 
     persist_local = settings.storage_backend in {"local", "both"}
 
-    base_name = Path(filename).name.replace("..", ".")
+    base_name = _safe_base_name(filename)
     dated_rel = _timestamp_path(base_name)
 
     # Choose base dir: persistent uploads vs temp area
@@ -99,86 +185,65 @@ def save_upload(file_bytes: bytes, filename: str) -> Tuple[str, Optional[str]]:
     target = base_dir / dated_rel
     target.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(target, "wb") as f:
-        f.write(file_bytes)
+    if from_path:
+        shutil.copyfile(source, target)
+    else:
+        with open(target, "wb") as f:
+            f.write(source)
 
     oci_url: Optional[str] = None
     if settings.storage_backend in {"oci", "both"} and settings.oci_os_bucket_name:
         obj_name = str(dated_rel).replace("\\", "/")
-        oci_url = _upload_to_oci(settings.oci_os_bucket_name, obj_name, file_bytes)
+        # Stream from the file just written rather than holding the payload
+        oci_url = _upload_to_oci(settings.oci_os_bucket_name, obj_name, target)
 
     return str(target), oci_url
 
 
 def save_upload_stream(fileobj, filename: str) -> Tuple[str, Optional[str]]:
     """Stream upload without loading whole file in memory.
-    - If backend includes 'oci', stream to OCI using UploadManager.upload_stream
-    - Always write a local file for ingestion:
+    - Write the local file first, enforcing the size cap incrementally so an
+      oversized body never lands fully on disk (and never reaches OCI)
+    - Then upload the verified file when backend includes 'oci':
         * when backend includes 'local' -> storage/uploads/YYYY/MM/DD/HHMMSS/<basename>
         * when backend is 'oci' only   -> storage/tmp_uploads/YYYY/MM/DD/HHMMSS/<basename>
     Returns (local_path_for_ingest, oci_object_url_or_None).
     """
-    import shutil
-    from typing import BinaryIO
-
     ensure_dirs()
     persist_local = settings.storage_backend in {"local", "both"}
 
-    base_name = Path(filename).name.replace("..", ".")
+    base_name = _safe_base_name(filename)
     dated_rel = _timestamp_path(base_name)
 
     base_dir = Path(settings.upload_dir) if persist_local else (Path(settings.data_dir) / "tmp_uploads")
     target = base_dir / dated_rel
     target.parent.mkdir(parents=True, exist_ok=True)
 
-    oci_url: Optional[str] = None
-
-    # If using OCI, stream the file object to Object Storage first (then rewind for local copy)
-    if settings.storage_backend in {"oci", "both"} and settings.oci_os_bucket_name:
-        try:
-            import oci  # type: ignore
-            cfg = None
-            if settings.oci_config_file:
-                cfg = oci.config.from_file(settings.oci_config_file, settings.oci_config_profile)
-                if settings.oci_region:
-                    cfg["region"] = settings.oci_region
-            else:
-                required = [settings.oci_tenancy_ocid, settings.oci_user_ocid, settings.oci_fingerprint, settings.oci_private_key_path]
-                if all(required):
-                    cfg = {
-                        "tenancy": settings.oci_tenancy_ocid,
-                        "user": settings.oci_user_ocid,
-                        "fingerprint": settings.oci_fingerprint,
-                        "key_file": settings.oci_private_key_path,
-                        "pass_phrase": settings.oci_private_key_passphrase,
-                        "region": settings.oci_region,
-                    }
-            if cfg:
-                osc = oci.object_storage.ObjectStorageClient(cfg)
-                ns = osc.get_namespace().data
-                upload_manager = oci.object_storage.UploadManager(osc, allow_parallel_uploads=True)
-                # Rewind stream to start
-                try:
-                    fileobj.seek(0)
-                except Exception:
-                    pass
-                object_name = str(dated_rel).replace("\\", "/")
-                upload_manager.upload_stream(ns, settings.oci_os_bucket_name, object_name, fileobj)
-                region = cfg.get("region") or settings.oci_region or ""
-                oci_url = f"https://objectstorage.{region}.oraclecloud.com/n/{urlquote(ns)}/b/{urlquote(settings.oci_os_bucket_name)}/o/{urlquote(object_name)}"
-                logger.info("OCI streaming upload complete: bucket=%s object=%s url=%s", settings.oci_os_bucket_name, object_name, oci_url)
-            else:
-                logger.warning("OCI streaming upload skipped: missing OCI config")
-        except Exception as e:
-            logger.exception("OCI streaming upload failed: %s", e)
-
-    # Rewind and copy to local target for ingestion
     try:
         fileobj.seek(0)
     except Exception:
         pass
+    max_bytes = settings.max_upload_size_mb * 1024 * 1024
+    written = 0
     with open(target, "wb") as out:
-        shutil.copyfileobj(fileobj, out)
+        while True:
+            buf = fileobj.read(1 << 20)
+            if not buf:
+                break
+            written += len(buf)
+            if written > max_bytes:
+                out.close()
+                target.unlink(missing_ok=True)
+                raise ValueError(f"File too large (> {settings.max_upload_size_mb} MB)")
+            out.write(buf)
+
+    oci_url: Optional[str] = None
+    if settings.storage_backend in {"oci", "both"} and settings.oci_os_bucket_name:
+        obj_name = str(dated_rel).replace("\\", "/")
+        # Stream from the size-checked file just written; uploading the raw
+        # request body first would push oversized uploads into the bucket
+        # before the cap rejects them locally
+        oci_url = _upload_to_oci(settings.oci_os_bucket_name, obj_name, target)
 
     return str(target), oci_url
 
@@ -196,31 +261,186 @@ def insert_document(conn: psycopg.Connection, source_path: str, source_type: str
 def insert_chunks(conn: psycopg.Connection, document_id: int, chunks: Sequence[str], embeddings: Sequence[Sequence[float]]) -> int:
     if len(chunks) != len(embeddings):
         raise ValueError("Chunks and embeddings length mismatch")
-    rows = []
-    for i, (content, emb) in enumerate(zip(chunks, embeddings)):
-        rows.append((document_id, i, content, len(content), settings.embedding_model_name, to_vec_literal(emb)))
-    with conn.cursor() as cur:
-        cur.executemany(
-            """
-            INSERT INTO chunks (document_id, chunk_index, content, content_chars, embedding_model, embedding)
-            VALUES (%s, %s, %s, %s, %s, %s::vector)
-            """,
-            rows,
-        )
-    return len(rows)
+    # When the pgvector psycopg adapter is registered on this connection, pass
+    # embeddings as float32 arrays (one contiguous buffer per row, sent in the
+    # pgvector wire format); otherwise fall back to text literals
+    use_adapter = conn.adapters.types.get("vector") is not None
+
+    # Row generator instead of a materialized list: rows flow straight into the
+    # driver, and the fallback path regenerates them rather than reusing a
+    # half-consumed iterator after a COPY failure
+    def _rows() -> Iterator[tuple]:
+        for i, (content, emb) in enumerate(zip(chunks, embeddings)):
+            emb_param = np.asarray(emb, dtype=np.float32) if use_adapter else to_vec_literal(emb)
+            yield (document_id, i, content, len(content), settings.embedding_model_name, emb_param)
+
+    # COPY streams all rows in one roundtrip; executemany paid one network
+    # roundtrip per chunk, which dominated ingest time for large documents
+    try:
+        # Nested transaction = savepoint when the caller already holds one
+        # (batch ingest does): a failed COPY aborts the server-side
+        # transaction, and without rolling back to the savepoint the
+        # executemany fallback would just raise InFailedSqlTransaction
+        with conn.transaction():
+            with conn.cursor() as cur:
+                with cur.copy(
+                    "COPY chunks (document_id, chunk_index, content, content_chars, embedding_model, embedding) FROM STDIN"
+                ) as copy:
+                    for row in _rows():
+                        copy.write_row(row)
+        return len(chunks)
+    except psycopg.Error as e:
+        logger.warning("COPY insert failed (%s); falling back to pipelined executemany", e)
+        return _insert_chunks_executemany(conn, _rows(), len(chunks))
+
+
+def _insert_chunks_executemany(conn: psycopg.Connection, rows: Iterable[tuple], count: int) -> int:
+    """Fallback bulk insert: pipeline mode coalesces the per-row sync points so
+    the batch still avoids one roundtrip per chunk even where COPY is unusable."""
+    with conn.pipeline():
+        with conn.cursor() as cur:
+            cur.executemany(
+                """
+                INSERT INTO chunks (document_id, chunk_index, content, content_chars, embedding_model, embedding)
+                VALUES (%s, %s, %s, %s, %s, %s::vector)
+                """,
+                rows,
+            )
+    return count
+
+
+def _hash_chunk(content: str) -> bytes:
+    """Cache key for one chunk: blake2b over model name + content.
+
+    Including the model name means a model switch simply misses instead of
+    serving vectors from the wrong embedding space.
+    """
+    h = hashlib.blake2b(digest_size=32)
+    h.update(settings.embedding_model_name.encode())
+    h.update(b"\x00")
+    h.update(content.encode())
+    return h.digest()
+
+
+def _vec_from_db(value) -> np.ndarray:
+    """Normalize a pgvector column value (ndarray via adapter, or text literal)."""
+    if isinstance(value, str):
+        return np.array(value.strip("[]").split(","), dtype=np.float32)
+    return np.asarray(value, dtype=np.float32)
 
 
-def ingest_file_path(file_path: str, title: Optional[str] = None, metadata: Optional[dict] = None, chunk_params: Optional[ChunkParams] = None) -> IngestResult:
+def embed_texts_cached(chunks: Sequence[str]) -> np.ndarray:
+    """embed_texts with a persistent content-hash cache in front.
+
+    Re-ingesting identical chunks (same file twice, boilerplate shared across
+    documents) skips the model, which dominates ingest cost. Cache reads and
+    writes are best-effort: any DB error degrades to a plain embed_texts call.
+    """
+    if not settings.embedding_cache_enabled or not chunks:
+        return embed_texts(chunks)
+    hashes = [_hash_chunk(c) for c in chunks]
+    found: dict[bytes, np.ndarray] = {}
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT chunk_hash, embedding FROM embedding_cache WHERE chunk_hash = ANY(%s)",
+                    (list(set(hashes)),),
+                )
+                for h, emb in cur.fetchall():
+                    found[bytes(h)] = _vec_from_db(emb)
+    except psycopg.Error as e:
+        logger.warning("Embedding cache lookup failed (%s); embedding all chunks", e)
+        return embed_texts(chunks)
+
+    miss_idx = [i for i, h in enumerate(hashes) if h not in found]
+    if not miss_idx:
+        logger.info("Embedding cache: %d/%d chunks served from cache", len(chunks), len(chunks))
+        return np.stack([found[h] for h in hashes])
+
+    miss_embs = embed_texts([chunks[i] for i in miss_idx])
+    out = np.empty((len(chunks), miss_embs.shape[1]), dtype=np.float32)
+    for j, i in enumerate(miss_idx):
+        out[i] = miss_embs[j]
+    for i, h in enumerate(hashes):
+        if h in found:
+            out[i] = found[h]
+
+    try:
+        with get_conn() as conn:
+            use_adapter = conn.adapters.types.get("vector") is not None
+            new_rows = {}
+            for j, i in enumerate(miss_idx):
+                emb_param = miss_embs[j] if use_adapter else to_vec_literal(miss_embs[j])
+                new_rows[hashes[i]] = (hashes[i], emb_param, settings.embedding_model_name)
+            with conn.pipeline():
+                with conn.cursor() as cur:
+                    cur.executemany(
+                        """
+                        INSERT INTO embedding_cache (chunk_hash, embedding, embedding_model)
+                        VALUES (%s, %s::vector, %s)
+                        ON CONFLICT (chunk_hash) DO NOTHING
+                        """,
+                        list(new_rows.values()),
+                    )
+    except psycopg.Error as e:
+        logger.warning("Embedding cache write failed (%s); continuing", e)
+    if found:
+        logger.info("Embedding cache: %d/%d chunks served from cache", len(chunks) - len(miss_idx), len(chunks))
+    return out
+
+
+def prepare_ingest(file_path: str, title: Optional[str] = None, metadata: Optional[dict] = None, chunk_params: Optional[ChunkParams] = None) -> PreparedIngest:
+    """Extraction + chunking phase of ingest (no model or DB work)."""
     text, source_type = read_text_from_file(file_path)
     # Use provided chunk params, else build from environment defaults
     cp = chunk_params or ChunkParams(settings.chunk_size, settings.chunk_overlap)
     chunks = chunk_text(text, cp)
     if not chunks:
         raise ValueError("No textual content extracted from file")
-    embeddings = embed_texts(chunks)
+    return PreparedIngest(file_path=file_path, source_type=source_type, chunks=chunks, title=title, metadata=metadata)
 
-    with get_conn() as conn:
-        doc_id = insert_document(conn, file_path, source_type, title=title, metadata=metadata)
-        n = insert_chunks(conn, doc_id, chunks, embeddings)
-    logger.info("Ingested file %s as document_id=%s with %s chunks", file_path, doc_id, n)
+
+def persist_ingest(prepared: PreparedIngest, embeddings: Sequence[Sequence[float]], conn: Optional[psycopg.Connection] = None) -> IngestResult:
+    """Persistence phase of ingest: write document row + chunk rows.
+
+    Pass `conn` to reuse an existing connection; batch callers share one pooled
+    lease (and one transaction) instead of checking out per file.
+    """
+    if conn is not None:
+        doc_id = insert_document(conn, prepared.file_path, prepared.source_type, title=prepared.title, metadata=prepared.metadata)
+        n = insert_chunks(conn, doc_id, prepared.chunks, embeddings)
+    else:
+        with get_conn() as conn:
+            doc_id = insert_document(conn, prepared.file_path, prepared.source_type, title=prepared.title, metadata=prepared.metadata)
+            n = insert_chunks(conn, doc_id, prepared.chunks, embeddings)
+    logger.info("Ingested file %s as document_id=%s with %s chunks", prepared.file_path, doc_id, n)
     return IngestResult(document_id=doc_id, num_chunks=n)
+
+
+def ingest_prepared_batch(prepared: Sequence[PreparedIngest]) -> list[IngestResult]:
+    """Embed the chunks of several prepared files as one batch, then persist each.
+
+    A single large encode amortizes tokenizer and model dispatch overhead that
+    per-file calls pay N times over. All files persist over one connection in
+    one transaction, so the batch lands atomically.
+    """
+    if not prepared:
+        return []
+    all_chunks: list[str] = []
+    offsets: list[int] = []
+    for p in prepared:
+        offsets.append(len(all_chunks))
+        all_chunks.extend(p.chunks)
+    embeddings = embed_texts_cached(all_chunks)
+    results: list[IngestResult] = []
+    with get_conn() as conn:
+        with conn.transaction():
+            for p, start in zip(prepared, offsets):
+                results.append(persist_ingest(p, embeddings[start : start + len(p.chunks)], conn=conn))
+    return results
+
+
+def ingest_file_path(file_path: str, title: Optional[str] = None, metadata: Optional[dict] = None, chunk_params: Optional[ChunkParams] = None, conn: Optional[psycopg.Connection] = None) -> IngestResult:
+    prepared = prepare_ingest(file_path, title=title, metadata=metadata, chunk_params=chunk_params)
+    return persist_ingest(prepared, embed_texts_cached(prepared.chunks), conn=conn)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import io
 import os
 import re
 from dataclasses import dataclass
@@ -12,13 +13,32 @@ from pypdf import PdfReader
 from docx import Document
 from .config import settings
 
+# HTML parsing speed ladder: selectolax (Lexbor, C) when available, else
+# BeautifulSoup backed by lxml, else the pure-Python html.parser
+try:
+    from selectolax.parser import HTMLParser as _SelectolaxParser  # type: ignore
+except Exception:
+    _SelectolaxParser = None
+
+try:
+    import lxml  # type: ignore  # noqa: F401
+    _BS4_HTML_PARSER = "lxml"
+except Exception:
+    _BS4_HTML_PARSER = "html.parser"
+
 
 # Prefer keeping paragraph boundaries; avoid collapsing all newlines into spaces
 PARA_SPLIT_RE = re.compile(r"(?:\r?\n){2,}")
-SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
 UPPER_HEADING_RE = re.compile(r"^[A-Z0-9][A-Z0-9 \-:]{2,}$")
 NUMBERED_HEADING_RE = re.compile(r"^(?:[IVXLCDM]+\.|\d+(?:\.\d+)*\.|[A-Z]\.)\s+.+")
 PAGE_FOOTER_RE = re.compile(r"^\s*page\s+\d+(?:\s+of\s+\d+)?\s*$", re.I)
+# Normalization/hyphenation patterns, compiled once so the hot text-cleaning
+# paths skip the re._cache lookup per call
+_MULTI_NEWLINE_RE = re.compile(r"\n{3,}")
+_PARA_GAP_RE = re.compile(r"(\n\s*){3,}")
+_HYPHEN_BREAK_RE = re.compile(r"-\n(?=\w)")
+_LONE_HYPHEN_RE = re.compile(r"\n-\n")
+_INTRA_PARA_NEWLINE_RE = re.compile(r"(?<!\n)\n(?!\n)")
 
 
 @dataclass
@@ -34,27 +54,24 @@ def _normalize_whitespace_preserve_paragraphs(text: str) -> str:
     # Normalize line endings
     text = text.replace("\r\n", "\n").replace("\r", "\n")
     # Collapse more than two consecutive newlines to exactly two
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    # Normalize spaces within lines
-    lines = []
-    for ln in text.split("\n"):
-        ln = re.sub(r"\s+", " ", ln).strip()
-        lines.append(ln)
-    text = "\n".join(lines)
+    text = _MULTI_NEWLINE_RE.sub("\n\n", text)
+    # Normalize spaces within lines; str.split() collapses whitespace runs and
+    # strips in one C pass, avoiding a regex scan per line
+    text = "\n".join(" ".join(ln.split()) for ln in text.split("\n"))
     # Restore paragraph boundaries
-    text = re.sub(r"(\n\s*){3,}", "\n\n", text)
+    text = _PARA_GAP_RE.sub("\n\n", text)
     return text.strip()
 
 
 def _fix_hyphenation(text: str) -> str:
     """Fix common PDF hyphenation like 'exam-\nple' -> 'example'."""
     # Join words broken by hyphen at line end
-    text = re.sub(r"-\n(?=\w)", "", text)
+    text = _HYPHEN_BREAK_RE.sub("", text)
     # Remove lone hyphens surrounded by newlines
-    text = re.sub(r"\n-\n", "\n", text)
+    text = _LONE_HYPHEN_RE.sub("\n", text)
     # Replace single newlines inside paragraphs with spaces (but keep double newlines)
     text = text.replace("\r\n", "\n").replace("\r", "\n")
-    text = re.sub(r"(?<!\n)\n(?!\n)", " ", text)
+    text = _INTRA_PARA_NEWLINE_RE.sub(" ", text)
     return text
 
 
@@ -113,22 +130,10 @@ def read_text_from_file(path: str) -> Tuple[str, str]:
     source_type: pdf|html|txt|docx|xml|csv|md|json
     """
     ext = os.path.splitext(path)[1].lower()
-    if ext == ".pdf":
-        return extract_text_from_pdf(path), "pdf"
-    if ext in {".html", ".htm"}:
-        return extract_text_from_html(path), "html"
-    if ext == ".docx":
-        return extract_text_from_docx(path), "docx"
-    if ext in {".txt", ""}:
-        return extract_text_from_txt(path), "txt"
-    if ext == ".xml":
-        return extract_text_from_xml(path), "xml"
-    if ext == ".csv":
-        return extract_text_from_csv(path), "csv"
-    if ext == ".md":
-        return extract_text_from_md(path), "md"
-    if ext == ".json":
-        return extract_text_from_json(path), "json"
+    handler = _EXT_HANDLERS.get(ext)
+    if handler is not None:
+        extractor, source_type = handler
+        return extractor(path), source_type
     # Fallback: read as text if possible
     try:
         return extract_text_from_txt(path), ext.lstrip('.') or 'txt'
@@ -165,32 +170,38 @@ def extract_text_from_pdf(path: str) -> str:
             # Fall back to other extractors if PyMuPDF is not available or fails
             pass
 
-    # pypdf extraction
+    # pypdf extraction; write pages straight into one buffer instead of a
+    # per-page list so large PDFs hold a single copy of the text in memory
     reader = PdfReader(path)
-    texts_pypdf: List[str] = []
+    num_pages = 0
+    buf = io.StringIO()
     try:
         for page in reader.pages:
-            txt = page.extract_text() or ""
-            texts_pypdf.append(txt)
+            if num_pages:
+                buf.write("\n\n")
+            buf.write(page.extract_text() or "")
+            num_pages += 1
     except Exception:
-        texts_pypdf = []
-    text_pypdf = "\n\n".join(texts_pypdf)
+        buf = io.StringIO()
+        num_pages = 0
+    text_pypdf = buf.getvalue()
     text_pypdf = _fix_hyphenation(text_pypdf)
     text_pypdf = _normalize_whitespace_preserve_paragraphs(text_pypdf)
     text_pypdf = _insert_heading_boundaries(text_pypdf)
 
     # Decide if we should try pdfplumber fallback (very sparse output or extremely short)
-    needs_fallback = len(text_pypdf.strip()) < 200 or text_pypdf.count("\n") < max(2, len(texts_pypdf) // 4)
+    needs_fallback = len(text_pypdf.strip()) < 200 or text_pypdf.count("\n") < max(2, num_pages // 4)
     if needs_fallback:
         try:
             import pdfplumber  # type: ignore
             with pdfplumber.open(path) as pdf:
-                pages_text = []
-                for page in pdf.pages:
+                plumb_buf = io.StringIO()
+                for i, page in enumerate(pdf.pages):
+                    if i:
+                        plumb_buf.write("\n\n")
                     # Tolerances can help capture columns/tables better
-                    t = page.extract_text(x_tolerance=1, y_tolerance=1) or ""
-                    pages_text.append(t)
-            text_plumb = "\n\n".join(pages_text)
+                    plumb_buf.write(page.extract_text(x_tolerance=1, y_tolerance=1) or "")
+            text_plumb = plumb_buf.getvalue()
             text_plumb = _fix_hyphenation(text_plumb)
             text_plumb = _normalize_whitespace_preserve_paragraphs(text_plumb)
             text_plumb = _insert_heading_boundaries(text_plumb)
@@ -207,7 +218,19 @@ def extract_text_from_pdf(path: str) -> str:
 def extract_text_from_html(path: str) -> str:
     with open(path, "rb") as f:
         data = f.read()
-    soup = BeautifulSoup(data, "html.parser")
+    if _SelectolaxParser is not None:
+        try:
+            tree = _SelectolaxParser(data)
+            # Remove nav-like elements
+            for node in tree.css("script, style, nav, header, footer"):
+                node.decompose()
+            body = tree.body or tree.root
+            if body is not None:
+                text = body.text(separator="\n", strip=True)
+                return _normalize_whitespace_preserve_paragraphs(text)
+        except Exception:
+            pass  # fall through to BeautifulSoup
+    soup = BeautifulSoup(data, _BS4_HTML_PARSER)
     # Remove nav-like elements
     for tag in soup(["script", "style", "nav", "header", "footer"]):
         tag.decompose()
@@ -286,55 +309,85 @@ def extract_text_from_docx(path: str) -> str:
     return text
 
 
-def _recursive_split(text: str, chunk_size: int, separators: tuple[str, ...]) -> List[str]:
-    if not text:
+# Extension -> (extractor, source_type): one dict lookup per file instead of
+# walking an if/elif ladder in the ingest loop
+_EXT_HANDLERS = {
+    ".pdf": (extract_text_from_pdf, "pdf"),
+    ".html": (extract_text_from_html, "html"),
+    ".htm": (extract_text_from_html, "html"),
+    ".docx": (extract_text_from_docx, "docx"),
+    ".txt": (extract_text_from_txt, "txt"),
+    "": (extract_text_from_txt, "txt"),
+    ".xml": (extract_text_from_xml, "xml"),
+    ".csv": (extract_text_from_csv, "csv"),
+    ".md": (extract_text_from_md, "md"),
+    ".json": (extract_text_from_json, "json"),
+}
+
+
+def _recursive_split(text: str, start: int, end: int, chunk_size: int, separators: tuple[str, ...]) -> List[Tuple[int, int]]:
+    """Split text[start:end] into (start, end) spans of at most chunk_size chars.
+
+    Working on index spans instead of substrings means no string is built until
+    the final slice in chunk_text, and buffered pieces at one separator level
+    are contiguous in the source, so the whole buffer is just (buf_start,
+    buf_end) — no joins, no per-piece copies.
+    """
+    if start >= end:
         return []
-    if len(text) <= chunk_size or not separators:
-        return [text]
+    if end - start <= chunk_size or not separators:
+        return [(start, end)]
 
     sep = separators[0]
-    if sep:
-        pieces = text.split(sep)
-        rebuilt: List[str] = []
-        buf = ""
-        joiner = sep
-        for piece in pieces:
-            candidate = (buf + joiner + piece) if buf else piece
-            if len(candidate) <= chunk_size:
-                buf = candidate
+    if not sep:
+        return [(i, min(i + chunk_size, end)) for i in range(start, end, chunk_size)]
+
+    spans: List[Tuple[int, int]] = []
+    buf_start = -1  # -1 = empty buffer
+    buf_end = -1
+    pos = start
+    while pos <= end:
+        idx = text.find(sep, pos, end)
+        p_start, p_end = pos, (idx if idx != -1 else end)
+        plen = p_end - p_start
+        fits = (p_end - buf_start if buf_start != -1 else plen) <= chunk_size
+        if fits:
+            if plen or buf_start != -1:  # an empty piece on an empty buffer is a no-op
+                if buf_start == -1:
+                    buf_start = p_start
+                buf_end = p_end
+        else:
+            if buf_start != -1:
+                spans.append((buf_start, buf_end))
+            if plen <= chunk_size:
+                buf_start, buf_end = (p_start, p_end) if plen else (-1, -1)
             else:
-                if buf:
-                    rebuilt.append(buf)
-                if len(piece) <= chunk_size:
-                    buf = piece
-                else:
-                    rebuilt.extend(_recursive_split(piece, chunk_size, separators[1:]))
-                    buf = ""
-        if buf:
-            rebuilt.append(buf)
-        return rebuilt
-    else:
-        return [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
-
-
-def _apply_overlap(chunks: List[str], overlap: int) -> List[str]:
-    if overlap <= 0 or not chunks:
-        return chunks
-    out: List[str] = []
-    prev_tail = ""
-    for ch in chunks:
-        prefix = prev_tail
-        combined = (prefix + ch) if prefix else ch
-        out.append(combined)
-        prev_tail = ch[-overlap:]
-    return out
+                spans.extend(_recursive_split(text, p_start, p_end, chunk_size, separators[1:]))
+                buf_start = buf_end = -1
+        if idx == -1:
+            break
+        pos = idx + len(sep)
+    if buf_start != -1:
+        spans.append((buf_start, buf_end))
+    return spans
 
 
 def chunk_text(text: str, params: ChunkParams = ChunkParams()) -> List[str]:
     # Normalize while preserving paragraph boundaries; add extra spacing around likely headings
     text = _normalize_whitespace_preserve_paragraphs(text)
+    if len(text) <= params.chunk_size:
+        # Already a single chunk: skip heading detection, splitting and overlap
+        return [text] if text else []
     text = _insert_heading_boundaries(text)
-    base_chunks = _recursive_split(text, params.chunk_size, params.separators)
-    if not base_chunks:
+    spans = _recursive_split(text, 0, len(text), params.chunk_size, params.separators)
+    if not spans:
         return []
-    return _apply_overlap(base_chunks, params.chunk_overlap)
+    overlap = params.chunk_overlap
+    if overlap <= 0:
+        return [text[s:e] for s, e in spans]
+    # Overlap is a single wider slice into the source (one copy per chunk)
+    # rather than concatenating the previous chunk's tail; the first chunk
+    # gets no prefix, and every chunk stays within chunk_size + overlap
+    out = [text[spans[0][0] : spans[0][1]]]
+    out.extend(text[max(0, s - overlap) : e] for s, e in spans[1:])
+    return out
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import gradio as gr
 from typing import List
 
 from .search import rag, semantic_search, fulltext_search
-from .store import ensure_dirs, ingest_file_path, save_upload
+from .store import ensure_dirs, ingest_prepared_batch, prepare_ingest, save_upload
 from .text_utils import ChunkParams
 from .db import get_conn
 
@@ -35,17 +36,39 @@ def build_ui():
             chunk_overlap = gr.Number(value=200, precision=0, label="Chunk overlap (chars)")
             ingest_btn = gr.Button("Ingest")
 
-            def do_ingest(file_list: List[str], chunk_size: int, chunk_overlap: int):
+            async def do_ingest(file_list: List[str], chunk_size: int, chunk_overlap: int):
                 if not file_list:
                     return "No files provided"
+                import os
+
+                cp = ChunkParams(int(chunk_size), int(chunk_overlap))
+
+                def _save_and_prepare(path: str):
+                    name = os.path.basename(path)
+                    # Pass the temp-file path: save_upload copies it kernel-side
+                    local_path, _oci_url = save_upload(path, name)
+                    return name, prepare_ingest(local_path, chunk_params=cp)
+
+                # Disk reads and OCI PUTs are I/O-bound: overlap them across files
+                # without tying up Gradio's handler thread pool
                 results = []
-                for path in file_list:
-                    import os
-                    with open(path, "rb") as f:
-                        data = f.read()
-                    saved = save_upload(data, os.path.basename(path))
-                    res = ingest_file_path(saved, chunk_params=ChunkParams(int(chunk_size), int(chunk_overlap)))
-                    results.append(f"{os.path.basename(path)}: document_id={res.document_id}, chunks={res.num_chunks}")
+                prepared = []
+                prepared_names = []
+                outcomes = await asyncio.gather(
+                    *(asyncio.to_thread(_save_and_prepare, p) for p in file_list),
+                    return_exceptions=True,
+                )
+                for path, outcome in zip(file_list, outcomes):
+                    if isinstance(outcome, BaseException):
+                        results.append(f"{os.path.basename(path)}: error={outcome}")
+                    else:
+                        name, prep = outcome
+                        prepared.append(prep)
+                        prepared_names.append(name)
+                # One embedding pass over all files' chunks, then persist per document
+                ingested = await asyncio.to_thread(ingest_prepared_batch, prepared)
+                for name, res in zip(prepared_names, ingested):
+                    results.append(f"{name}: document_id={res.document_id}, chunks={res.num_chunks}")
                 return "\n".join(results)
 
             ingest_btn.click(do_ingest, inputs=[files, chunk_size, chunk_overlap], outputs=[status])
@@ -64,21 +87,21 @@ def build_ui():
                     out_lines.append(" | ".join("" if x is None else str(x) for x in r[:5]) + " | " + r[5])
                 return "\n\n".join(out_lines)
 
-            def do_search(q: str, m: str, k: int):
+            async def do_search(q: str, m: str, k: int):
                 m = m.lower()
                 if m == "semantic":
-                    hits = semantic_search(q, top_k=int(k))
+                    hits = await asyncio.to_thread(semantic_search, q, top_k=int(k))
                     rows = [[h.chunk_id, h.document_id, h.chunk_index, h.distance, None, h.content] for h in hits]
                     return "\n\n".join(h.content for h in hits), _rows_to_text(rows)
                 if m == "fulltext":
-                    hits = fulltext_search(q, top_k=int(k))
+                    hits = await asyncio.to_thread(fulltext_search, q, top_k=int(k))
                     rows = [[h.chunk_id, h.document_id, h.chunk_index, None, h.rank, h.content] for h in hits]
                     return "\n\n".join(h.content for h in hits), _rows_to_text(rows)
                 if m == "rag":
-                    ans, hits, _used_llm = rag(q, mode="hybrid", top_k=int(k))
+                    ans, hits, _used_llm = await asyncio.to_thread(rag, q, mode="hybrid", top_k=int(k))
                     rows = [[h.chunk_id, h.document_id, h.chunk_index, h.distance, h.rank, h.content] for h in hits]
                     return ans, _rows_to_text(rows)
-                hits = rag(q, mode="hybrid", top_k=int(k))[1]
+                hits = (await asyncio.to_thread(rag, q, mode="hybrid", top_k=int(k)))[1]
                 rows = [[h.chunk_id, h.document_id, h.chunk_index, h.distance, h.rank, h.content] for h in hits]
                 return "\n\n".join(h.content for h in hits), _rows_to_text(rows)
 